@@ -1,34 +1,63 @@
 """
 Bilibili Video Info MCP Server
 """
-import argparse
+import asyncio
 import signal
 import sys
+from . import bilibili_api
 from .server import mcp
 
 
+TRANSPORTS = ('stdio', 'sse', 'streamable-http')
+USAGE = "usage: bilibili-video-info-mcp [{stdio,sse,streamable-http}]"
+
+
+def _parse_transport(argv: list) -> str:
+    """Return the transport given on the command line, defaulting to stdio."""
+    if not argv:
+        return 'stdio'
+    if argv[0] in ('-h', '--help'):
+        print(f"{USAGE}\n\nBilibili Video Info MCP Server\n\n"
+              "positional arguments:\n  transport  Transport type (stdio, sse, or streamable-http)")
+        sys.exit(0)
+    if len(argv) > 1 or argv[0] not in TRANSPORTS:
+        print(f"{USAGE}\nerror: invalid transport {' '.join(argv)!r} "
+              f"(choose from {', '.join(TRANSPORTS)})", file=sys.stderr)
+        sys.exit(2)
+    return argv[0]
+
+
 def _handle_shutdown(signum, frame):
     """Handle shutdown signals gracefully."""
     print("\nShutting down gracefully...")
     sys.exit(0)
 
 
+def _use_uvloop():
+    """Use uvloop as the event loop when it is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
 def main():
     # Register signal handlers for graceful shutdown
     signal.signal(signal.SIGINT, _handle_shutdown)
     signal.signal(signal.SIGTERM, _handle_shutdown)
 
-    parser = argparse.ArgumentParser(description="Bilibili Video Info MCP Server")
-    parser.add_argument('transport', nargs='?', default='stdio', choices=['stdio', 'sse', 'streamable-http'],
-                        help='Transport type (stdio, sse, or streamable-http)')
-    args = parser.parse_args()
+    transport = _parse_transport(sys.argv[1:])
 
+    _use_uvloop()
     try:
-        mcp.run(transport=args.transport)
+        mcp.run(transport=transport)
     except SystemExit:
         pass
     except KeyboardInterrupt:
         print("\nShutting down...")
+    finally:
+        bilibili_api.close_session()
 
 
 if __name__ == "__main__":
@@ -1,24 +1,35 @@
 import re
 import requests
-import xml.etree.ElementTree as ET
+from requests.adapters import HTTPAdapter
+import urllib3
+from urllib3.util.retry import Retry
+try:
+    from lxml import etree as ET
+except ImportError:  # lxml is optional, fall back to the stdlib parser
+    import xml.etree.ElementTree as ET
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # orjson is optional, fall back to the stdlib decoder
+    from json import loads as _json_loads
 import os
+import sys
+import threading
 import time
 import urllib.parse
-from functools import reduce
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from hashlib import md5
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
-
-def get_seesdata() -> str:
-    """Get the Bilibili SESSDATA from environment variables"""
-    seesdata = os.getenv("SESSDATA")
-    if not seesdata:
+@lru_cache(maxsize=1)
+def _get_sessdata() -> str:
+    """Get the Bilibili SESSDATA from environment variables, loaded on first use"""
+    # Load environment variables from .env file
+    load_dotenv()
+    sessdata = os.getenv("SESSDATA")
+    if not sessdata:
         raise ValueError("SESSDATA environment variable is required")
-    return seesdata
-
-SESSDATA = get_seesdata()
+    return sessdata
 
 
 # Bilibili API endpoints
@@ -51,6 +62,114 @@ SEARCH_ORDER_OPTIONS = {
     'bili_user': ['0', 'fans', 'level']
 }
 
+# Fields kept for each search type: (output key, source key, transform)
+# transform is None, 'html' (strip highlight tags) or 'time' (format timestamp)
+_MEDIA_FIELDS = (
+    ('media_id', 'media_id', None),
+    ('season_id', 'season_id', None),
+    ('title', 'title', 'html'),
+    ('org_title', 'org_title', None),
+    ('cover', 'cover', None),
+    ('media_type', 'media_type', None),
+    ('areas', 'areas', None),
+    ('styles', 'styles', None),
+    ('cv', 'cv', None),
+    ('staff', 'staff', None),
+    ('pubtime', 'pubtime', 'time'),
+    ('media_score', 'media_score', None),
+)
+SEARCH_RESULT_FIELDS = {
+    'video': (
+        ('bvid', 'bvid', None),
+        ('title', 'title', 'html'),
+        ('author', 'author', None),
+        ('mid', 'mid', None),
+        ('play', 'play', None),
+        ('danmaku', 'video_review', None),
+        ('favorites', 'favorites', None),
+        ('duration', 'duration', None),
+        ('pubdate', 'pubdate', 'time'),
+        ('description', 'description', None),
+        ('pic', 'pic', None),
+        ('tag', 'tag', None),
+    ),
+    'media_bangumi': _MEDIA_FIELDS,
+    'media_ft': _MEDIA_FIELDS,
+    'live_room': (
+        ('roomid', 'roomid', None),
+        ('title', 'title', 'html'),
+        ('uname', 'uname', None),
+        ('uid', 'uid', None),
+        ('online', 'online', None),
+        ('cover', 'cover', None),
+        ('user_cover', 'user_cover', None),
+        ('area_name', 'cate_name', None),
+        ('tags', 'tags', None),
+    ),
+    'live_user': (
+        ('uid', 'uid', None),
+        ('uname', 'uname', None),
+        ('uface', 'uface', None),
+        ('roomid', 'roomid', None),
+        ('live_status', 'live_status', None),
+        ('tags', 'tags', None),
+    ),
+    'article': (
+        ('id', 'id', None),
+        ('title', 'title', 'html'),
+        ('author', 'mid', None),
+        ('category_name', 'category_name', None),
+        ('view', 'view', None),
+        ('like', 'like', None),
+        ('reply', 'reply', None),
+        ('pub_time', 'pub_time', 'time'),
+        ('desc', 'desc', None),
+        ('image_urls', 'image_urls', None),
+    ),
+    'bili_user': (
+        ('mid', 'mid', None),
+        ('uname', 'uname', None),
+        ('usign', 'usign', None),
+        ('fans', 'fans', None),
+        ('videos', 'videos', None),
+        ('level', 'level', None),
+        ('upic', 'upic', None),
+        ('official_verify', 'official_verify', None),
+    ),
+    'photo': (
+        ('id', 'id', None),
+        ('title', 'title', 'html'),
+        ('mid', 'mid', None),
+        ('uname', 'uname', None),
+        ('count', 'count', None),
+        ('like', 'like', None),
+        ('view', 'view', None),
+    ),
+    'topic': (
+        ('topic_id', 'topic_id', None),
+        ('topic_name', 'topic_name', 'html'),
+        ('update_count', 'update_count', None),
+        ('view_count', 'view_count', None),
+        ('discuss_count', 'discuss_count', None),
+        ('description', 'description', None),
+    ),
+}
+
+# Per type: all (output key, source key) pairs, plus the fields needing a transform
+_SEARCH_PROJECTIONS = {
+    search_type: (
+        tuple((dst, src) for dst, src, _ in fields),
+        tuple(field for field in fields if field[2] is not None),
+    )
+    for search_type, fields in SEARCH_RESULT_FIELDS.items()
+}
+
+# Precompiled patterns for BV id extraction and highlight tag stripping
+_BVID_RE = re.compile(r'BV[1-9A-HJ-NP-Za-km-z]{10}')
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_WBI_IMG_URL_RE = re.compile(rb'"img_url"\s*:\s*"([^"]+)"')
+_WBI_SUB_URL_RE = re.compile(rb'"sub_url"\s*:\s*"([^"]+)"')
+
 # WBI signature mixin key encoding table
 MIXIN_KEY_ENC_TAB = [
     46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
@@ -58,22 +177,48 @@ MIXIN_KEY_ENC_TAB = [
     61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
     36, 20, 34, 44, 52
 ]
+# Only the first 32 positions are used for the mixin key
+MIXIN_KEY_ENC_TAB_32 = tuple(MIXIN_KEY_ENC_TAB[:32])
+# Characters removed from param values before signing
+_WBI_STRIP_CHARS = str.maketrans('', '', "!'()*")
 
 # WBI keys cache
 _wbi_keys_cache = {
     'img_key': None,
     'sub_key': None,
-    'last_update': 0
+    'last_update': 0,
+    'refreshing': False
 }
 WBI_KEYS_CACHE_TTL = 3600  # Cache TTL in seconds (1 hour)
+WBI_SIGN_CACHE_TTL = 60  # Window in seconds during which a signature is reused
 
 # buvid3 cache
 _buvid3_cache = {
     'buvid3': None,
     'b_nut': None,
-    'last_update': 0
+    'last_update': 0,
+    'last_attempt': 0,
+    'refreshing': False
 }
 BUVID3_CACHE_TTL = 86400  # Cache TTL in seconds (24 hours)
+BUVID3_RETRY_INTERVAL = 300  # Wait this long after a failed fetch before trying again
+
+# Expired WBI keys / buvid3 are still served for one more TTL while a
+# background thread refreshes them
+_cache_refresh_lock = threading.Lock()
+
+# Video basic info cache: bvid -> (aid, cid, last_update)
+_video_info_cache = {}
+VIDEO_INFO_CACHE_TTL = 21600  # Cache TTL in seconds (6 hours), aid/cid never change
+VIDEO_INFO_CACHE_MAXSIZE = 1024
+# In-flight lookups: bvid -> lock held by the thread fetching it
+_video_info_locks = {}
+_video_info_locks_guard = threading.Lock()
+
+# Resolved short links: b23.tv URL -> bvid, so each tool called on the same
+# short link doesn't follow its redirect again
+_short_url_cache = {}
+SHORT_URL_CACHE_MAXSIZE = 1024
 
 # Default Headers for requests
 DEFAULT_HEADERS = {
@@ -81,123 +226,254 @@ DEFAULT_HEADERS = {
     'Referer': 'https://www.bilibili.com/'
 }
 
-def _get_buvid3() -> tuple:
-    """Get buvid3 and b_nut cookies from bilibili.com with caching."""
-    global _buvid3_cache
-    current_time = time.time()
+# Timeout in seconds for every request to Bilibili, so a stalled connection
+# cannot hold an outbound slot forever
+REQUEST_TIMEOUT = 10
+# Default limit on concurrent requests to Bilibili, overridden by BILI_CONCURRENCY
+DEFAULT_CONCURRENCY = 32
+
+# Shared session so keep-alive connections are pooled across API calls; the
+# adapter is mounted on first use, sized like the concurrency limit
+_SESSION = requests.Session()
+_SESSION.headers.update(DEFAULT_HEADERS)
+_outbound_semaphore = None
+_outbound_init_lock = threading.Lock()
+
+
+def _get_concurrency() -> int:
+    """Read the outbound concurrency limit from BILI_CONCURRENCY, falling back to the default"""
+    load_dotenv()
+    value = os.getenv("BILI_CONCURRENCY")
+    if not value:
+        return DEFAULT_CONCURRENCY
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        print(f"Invalid BILI_CONCURRENCY {value!r}, must be a positive integer; "
+              f"using {DEFAULT_CONCURRENCY}", file=sys.stderr)
+        return DEFAULT_CONCURRENCY
+    return limit
+
+
+def _outbound_slots() -> threading.BoundedSemaphore:
+    """Semaphore bounding concurrent requests to Bilibili, created with the connection pool on first use"""
+    global _outbound_semaphore
+    if _outbound_semaphore is None:
+        with _outbound_init_lock:
+            if _outbound_semaphore is None:
+                limit = _get_concurrency()
+                _SESSION.mount('https://', HTTPAdapter(
+                    pool_connections=16,
+                    pool_maxsize=limit,
+                    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504])
+                ))
+                _outbound_semaphore = threading.BoundedSemaphore(limit)
+    return _outbound_semaphore
+
+
+def _request(method: str, url: str, **kwargs) -> requests.Response:
+    """Send a request through the shared session once an outbound slot is free."""
+    kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+    with _outbound_slots():
+        return _SESSION.request(method, url, **kwargs)
+
+
+def close_session() -> None:
+    """Close pooled connections held by the shared session."""
+    _SESSION.close()
+
+
+def _refresh_in_background(cache: dict, refresh) -> None:
+    """Run refresh() in a daemon thread unless one is already running for cache."""
+    with _cache_refresh_lock:
+        if cache['refreshing']:
+            return
+        cache['refreshing'] = True
+
+    def run():
+        try:
+            refresh()
+        finally:
+            cache['refreshing'] = False
 
-    # Check if cache is valid
-    if (_buvid3_cache['buvid3'] and
-            current_time - _buvid3_cache['last_update'] < BUVID3_CACHE_TTL):
-        return _buvid3_cache['buvid3'], _buvid3_cache['b_nut']
+    threading.Thread(target=run, daemon=True).start()
 
-    # Fetch new buvid3 from bilibili.com
-    headers = DEFAULT_HEADERS.copy()
+
+def _bounded_put(cache: dict, key, value, maxsize: int) -> None:
+    """Insert into a dict cache, evicting the oldest entry once it is full."""
+    if len(cache) >= maxsize:
+        try:
+            del cache[next(iter(cache))]
+        except (StopIteration, RuntimeError, KeyError):
+            pass  # Another thread changed the cache concurrently
+    cache[key] = value
+
+
+def _refresh_buvid3() -> tuple:
+    """Fetch buvid3 and b_nut cookies from bilibili.com and update the cache."""
+    _buvid3_cache['last_attempt'] = time.time()
     try:
-        resp = requests.get('https://www.bilibili.com/', headers=headers, timeout=10)
+        # Bilibili only issues buvid3 to visitors that don't send one, so bypass
+        # the shared session, whose cookie jar keeps the previous value
+        with _outbound_slots():
+            resp = requests.get('https://www.bilibili.com/', headers=DEFAULT_HEADERS,
+                                timeout=REQUEST_TIMEOUT)
         buvid3 = resp.cookies.get('buvid3', '')
         b_nut = resp.cookies.get('b_nut', '')
 
         if buvid3:
             _buvid3_cache['buvid3'] = buvid3
             _buvid3_cache['b_nut'] = b_nut
-            _buvid3_cache['last_update'] = current_time
+            _buvid3_cache['last_update'] = time.time()
             return buvid3, b_nut
 
     except requests.RequestException as e:
         print(f"Failed to get buvid3: {e}")
 
+    return '', ''
+
+
+def _get_buvid3() -> tuple:
+    """Get buvid3 and b_nut cookies from bilibili.com with caching."""
+    buvid3, b_nut = _buvid3_cache['buvid3'], _buvid3_cache['b_nut']
+    # After a failed fetch, keep serving what we have instead of retrying on every call
+    retry_allowed = time.time() - _buvid3_cache['last_attempt'] >= BUVID3_RETRY_INTERVAL
+
+    if buvid3:
+        age = time.time() - _buvid3_cache['last_update']
+        # Check if cache is valid
+        if age < BUVID3_CACHE_TTL:
+            return buvid3, b_nut
+        # Serve stale values within the grace window and refresh in the background
+        if age < BUVID3_CACHE_TTL * 2:
+            if retry_allowed:
+                _refresh_in_background(_buvid3_cache, _refresh_buvid3)
+            return buvid3, b_nut
+
+    # Fetch new buvid3 from bilibili.com
+    if retry_allowed:
+        new_buvid3, new_b_nut = _refresh_buvid3()
+        if new_buvid3:
+            return new_buvid3, new_b_nut
+
     # Return cached values if available
-    if _buvid3_cache['buvid3']:
-        return _buvid3_cache['buvid3'], _buvid3_cache['b_nut']
+    if buvid3:
+        return buvid3, b_nut
 
     return '', ''
 
 
-def _get_headers(with_buvid3: bool = False):
-    headers = DEFAULT_HEADERS.copy()
-    cookies = []
-    if SESSDATA:
-        cookies.append(f'SESSDATA={SESSDATA}')
+def _get_cookies(with_buvid3: bool = False) -> dict:
+    cookies = {'SESSDATA': _get_sessdata()}
     if with_buvid3:
         buvid3, b_nut = _get_buvid3()
         if buvid3:
-            cookies.append(f'buvid3={buvid3}')
+            cookies['buvid3'] = buvid3
         if b_nut:
-            cookies.append(f'b_nut={b_nut}')
-    if cookies:
-        headers['Cookie'] = '; '.join(cookies)
-    return headers
+            cookies['b_nut'] = b_nut
+    return cookies
 
 
+@lru_cache(maxsize=4)
 def _get_mixin_key(orig: str) -> str:
     """Generate mixin key from img_key + sub_key using the encoding table."""
-    return reduce(lambda s, i: s + orig[i], MIXIN_KEY_ENC_TAB, '')[:32]
+    return ''.join([orig[i] for i in MIXIN_KEY_ENC_TAB_32])
 
 
-def _get_wbi_keys() -> tuple:
-    """Get WBI keys (img_key, sub_key) from nav API with caching."""
-    global _wbi_keys_cache
-    current_time = time.time()
+def _wbi_key_from_url(url: bytes) -> str:
+    """Extract the key (file name without extension) from a wbi_img URL."""
+    return url.rsplit(b'/', 1)[-1].split(b'.', 1)[0].decode()
 
-    # Check if cache is valid
-    if (_wbi_keys_cache['img_key'] and _wbi_keys_cache['sub_key'] and
-            current_time - _wbi_keys_cache['last_update'] < WBI_KEYS_CACHE_TTL):
-        return _wbi_keys_cache['img_key'], _wbi_keys_cache['sub_key']
 
-    # Fetch new keys from nav API
-    headers = _get_headers()
+def _refresh_wbi_keys() -> tuple:
+    """Fetch WBI keys (img_key, sub_key) from nav API and update the cache."""
+    cookies = _get_cookies()
     try:
-        resp = requests.get('https://api.bilibili.com/x/web-interface/nav', headers=headers)
+        resp = _request('GET', 'https://api.bilibili.com/x/web-interface/nav', cookies=cookies)
         resp.raise_for_status()
-        json_content = resp.json()
 
-        # wbi_img is available even when not logged in (code=-101)
-        wbi_img = json_content.get('data', {}).get('wbi_img', {})
-        img_url = wbi_img.get('img_url', '')
-        sub_url = wbi_img.get('sub_url', '')
+        # wbi_img is available even when not logged in (code=-101); only the
+        # two URLs are needed, so pluck them out instead of decoding the payload
+        img_match = _WBI_IMG_URL_RE.search(resp.content)
+        sub_match = _WBI_SUB_URL_RE.search(resp.content)
 
         # Extract keys from URLs
-        img_key = img_url.rsplit('/', 1)[-1].split('.')[0] if img_url else ''
-        sub_key = sub_url.rsplit('/', 1)[-1].split('.')[0] if sub_url else ''
+        img_key = _wbi_key_from_url(img_match.group(1)) if img_match else ''
+        sub_key = _wbi_key_from_url(sub_match.group(1)) if sub_match else ''
 
         if img_key and sub_key:
             _wbi_keys_cache['img_key'] = img_key
             _wbi_keys_cache['sub_key'] = sub_key
-            _wbi_keys_cache['last_update'] = current_time
+            _wbi_keys_cache['last_update'] = time.time()
             return img_key, sub_key
 
     except requests.RequestException as e:
         print(f"Failed to get WBI keys: {e}")
 
+    return '', ''
+
+
+def _get_wbi_keys() -> tuple:
+    """Get WBI keys (img_key, sub_key) from nav API with caching."""
+    img_key, sub_key = _wbi_keys_cache['img_key'], _wbi_keys_cache['sub_key']
+
+    if img_key and sub_key:
+        age = time.time() - _wbi_keys_cache['last_update']
+        # Check if cache is valid
+        if age < WBI_KEYS_CACHE_TTL:
+            return img_key, sub_key
+        # Serve stale keys within the grace window and refresh in the background
+        if age < WBI_KEYS_CACHE_TTL * 2:
+            _refresh_in_background(_wbi_keys_cache, _refresh_wbi_keys)
+            return img_key, sub_key
+
+    # Fetch new keys from nav API
+    new_img_key, new_sub_key = _refresh_wbi_keys()
+    if new_img_key and new_sub_key:
+        return new_img_key, new_sub_key
+
     # Return cached keys if available, even if expired
-    if _wbi_keys_cache['img_key'] and _wbi_keys_cache['sub_key']:
-        return _wbi_keys_cache['img_key'], _wbi_keys_cache['sub_key']
+    if img_key and sub_key:
+        return img_key, sub_key
 
     return '', ''
 
 
-def _enc_wbi(params: dict, img_key: str, sub_key: str) -> dict:
-    """Encode parameters with WBI signature."""
-    mixin_key = _get_mixin_key(img_key + sub_key)
-    curr_time = round(time.time())
-    params['wts'] = curr_time
+def prefetch_wbi_credentials() -> None:
+    """Fill the buvid3 and WBI key caches used by signed requests if they are cold."""
+    _get_buvid3()
+    _get_wbi_keys()
 
-    # Sort parameters by key
-    params = dict(sorted(params.items()))
 
-    # Filter special characters from values
-    params = {
-        k: ''.join(filter(lambda c: c not in "!'()*", str(v)))
-        for k, v in params.items()
-    }
+@lru_cache(maxsize=256)
+def _enc_wbi_cached(items: tuple, wts: int, img_key: str, sub_key: str) -> tuple:
+    """Sign already sorted and filtered param items for a given wts."""
+    mixin_key = _get_mixin_key(img_key + sub_key)
+    params = dict(sorted(items + (('wts', str(wts)),)))
 
     # Generate query string and calculate signature
     query = urllib.parse.urlencode(params)
     wbi_sign = md5((query + mixin_key).encode()).hexdigest()
     params['w_rid'] = wbi_sign
 
-    return params
+    return tuple(params.items())
+
+
+def _enc_wbi(params: dict, img_key: str, sub_key: str) -> dict:
+    """Encode parameters with WBI signature."""
+    # Identical params within the same window reuse one signature
+    curr_time = round(time.time())
+    wts = curr_time - curr_time % WBI_SIGN_CACHE_TTL
+
+    # Sort parameters by key and filter special characters from values
+    items = tuple(sorted(
+        (k, str(v).translate(_WBI_STRIP_CHARS))
+        for k, v in params.items() if k != 'wts'
+    ))
+
+    return dict(_enc_wbi_cached(items, wts, img_key, sub_key))
 
 
 def _sign_params_wbi(params: dict) -> dict:
@@ -208,46 +484,116 @@ def _sign_params_wbi(params: dict) -> dict:
     return _enc_wbi(params, img_key, sub_key)
 
 def extract_bvid(url):
-    # 先尝试直接从URL中提取BV号
-    match = re.search(r'BV[a-zA-Z0-9_]+', url)
-    if match:
-        return match.group(0)
+    # 先尝试直接从URL中提取BV号（不含 "BV" 的输入无需进入正则）
+    if 'BV' in url:
+        match = _BVID_RE.search(url)
+        if match:
+            return match.group(0)
     
     # 如果是短链接（如b23.tv），则跟踪重定向获取完整URL
     if 'b23.tv' in url:
+        bvid = _short_url_cache.get(url)
+        if bvid:
+            return bvid
         try:
-            response = requests.head(url, headers=_get_headers(), allow_redirects=True)
+            response = _request('HEAD', url, cookies=_get_cookies(), allow_redirects=True)
             if response.status_code == 200:
                 # 获取最终重定向后的URL
                 final_url = response.url
-                match = re.search(r'BV[a-zA-Z0-9_]+', final_url)
+                match = _BVID_RE.search(final_url)
                 if match:
+                    _bounded_put(_short_url_cache, url, match.group(0), SHORT_URL_CACHE_MAXSIZE)
                     return match.group(0)
         except requests.RequestException as e:
             print(f"Error resolving short URL: {e}")
     
     return None
 
+def _get_cached_video_info(bvid):
+    cached = _video_info_cache.get(bvid)
+    if cached and time.time() - cached[2] < VIDEO_INFO_CACHE_TTL:
+        return cached
+    return None
+
+
 def get_video_basic_info(bvid):
     """Gets aid and cid for a given bvid."""
-    headers = _get_headers()
+    cached = _get_cached_video_info(bvid)
+    if cached:
+        return cached[0], cached[1], None
+
+    # Concurrent lookups of the same uncached video wait for a single request
+    with _video_info_locks_guard:
+        lock = _video_info_locks.setdefault(bvid, threading.Lock())
+    with lock:
+        try:
+            cached = _get_cached_video_info(bvid)
+            if cached:
+                return cached[0], cached[1], None
+            return _fetch_video_basic_info(bvid)
+        finally:
+            # A waiter on an older lock must not drop a newer fetch's lock
+            with _video_info_locks_guard:
+                if _video_info_locks.get(bvid) is lock:
+                    del _video_info_locks[bvid]
+
+
+def _fetch_video_basic_info(bvid):
+    """Fetches aid and cid for a given bvid from the view API and caches them."""
+    cookies = _get_cookies()
     try:
         params_view = {'bvid': bvid}
-        response_view = requests.get(API_GET_VIEW_INFO, params=params_view, headers=headers)
+        response_view = _request('GET', API_GET_VIEW_INFO, params=params_view, cookies=cookies)
         response_view.raise_for_status()
-        data_view = response_view.json()
+        data_view = _json_loads(response_view.content)
 
         if data_view['code'] != 0:
             return None, None, {'error': 'Failed to get video info', 'details': data_view}
 
         video_data = data_view['data']
-        return video_data.get('aid'), video_data.get('cid'), None
-    except requests.RequestException as e:
+        aid, cid = video_data.get('aid'), video_data.get('cid')
+        _bounded_put(_video_info_cache, bvid, (aid, cid, time.time()), VIDEO_INFO_CACHE_MAXSIZE)
+
+        return aid, cid, None
+    except (requests.RequestException, ValueError) as e:
         return None, None, {'error': f'Failed to fetch video details: {e}'}
 
 # Language priority for subtitle selection
 SUBTITLE_LANGUAGE_PRIORITY = ['zh', 'ai-zh', 'en', 'ai-en', 'ja', 'ai-ja']
 
+# Max parallel downloads when fetching several subtitle tracks
+SUBTITLE_FETCH_WORKERS = 8
+
+# Subtitle content cache: subtitle file URL (without query) -> tuple of lines
+_subtitle_cache = {}
+SUBTITLE_CACHE_MAXSIZE = 512
+
+
+def _fetch_subtitle_content(sub_meta: dict, cookies: dict):
+    """Download a single subtitle track, returning None on failure."""
+    lan = sub_meta['lan']
+    subtitle_json_url = f"https:{sub_meta['subtitle_url']}"
+    # Subtitle files are immutable and named by content hash; the query string
+    # only carries a short-lived auth_key, so the path identifies the content
+    cache_key = subtitle_json_url.split('?', 1)[0]
+    try:
+        content = _subtitle_cache.get(cache_key)
+        if content is None:
+            response_sub_content = _request('GET', subtitle_json_url, cookies=cookies)
+            response_sub_content.raise_for_status()
+            sub_content = _json_loads(response_sub_content.content)
+            subtitle_body = sub_content.get('body', [])
+            content = tuple(item.get('content', '') for item in subtitle_body)
+            _bounded_put(_subtitle_cache, cache_key, content, SUBTITLE_CACHE_MAXSIZE)
+        return {
+            'lan': lan,
+            'lan_doc': sub_meta.get('lan_doc', ''),
+            'content': list(content)
+        }
+    except (requests.RequestException, ValueError) as e:
+        print(f"Could not fetch subtitle content for {lan}: {e}")
+        return None
+
 
 def get_subtitles(aid, cid, lang: str = None, all_languages: bool = False):
     """Fetches subtitles for a given aid and cid.
@@ -262,15 +608,14 @@ def get_subtitles(aid, cid, lang: str = None, all_languages: bool = False):
     Returns:
         Tuple of (subtitles_list, error_dict or None)
     """
-    headers = _get_headers(with_buvid3=True)
-    subtitles = []
+    cookies = _get_cookies(with_buvid3=True)
     try:
         params_subtitle = {'aid': aid, 'cid': cid}
         # Sign params with WBI for subtitle API
         signed_params = _sign_params_wbi(params_subtitle)
-        response_subtitle = requests.get(API_GET_SUBTITLE, params=signed_params, headers=headers)
+        response_subtitle = _request('GET', API_GET_SUBTITLE, params=signed_params, cookies=cookies)
         response_subtitle.raise_for_status()
-        subtitle_data = response_subtitle.json()
+        subtitle_data = _json_loads(response_subtitle.content)
 
         if subtitle_data.get('code') != 0:
             return [], {'error': f"API error: {subtitle_data.get('message', 'Unknown error')}"}
@@ -306,54 +651,51 @@ def get_subtitles(aid, cid, lang: str = None, all_languages: bool = False):
             if not langs_to_fetch and subtitle_map:
                 langs_to_fetch = [list(subtitle_map.keys())[0]]
 
-        # Fetch subtitle content for selected languages
-        for lan in langs_to_fetch:
-            sub_meta = subtitle_map.get(lan)
-            if not sub_meta:
-                continue
-            try:
-                subtitle_json_url = f"https:{sub_meta['subtitle_url']}"
-                response_sub_content = requests.get(subtitle_json_url, headers=headers)
-                response_sub_content.raise_for_status()
-                sub_content = response_sub_content.json()
-                subtitle_body = sub_content.get('body', [])
-                content_list = [item.get('content', '') for item in subtitle_body]
-                subtitles.append({
-                    'lan': sub_meta['lan'],
-                    'lan_doc': sub_meta.get('lan_doc', ''),
-                    'content': content_list
-                })
-            except requests.RequestException as e:
-                print(f"Could not fetch subtitle content for {lan}: {e}")
+        # Fetch subtitle content for selected languages concurrently
+        sub_metas = [subtitle_map[lan] for lan in langs_to_fetch if lan in subtitle_map]
+        if len(sub_metas) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(sub_metas), SUBTITLE_FETCH_WORKERS)) as executor:
+                fetched = list(executor.map(lambda m: _fetch_subtitle_content(m, cookies), sub_metas))
+        else:
+            fetched = [_fetch_subtitle_content(m, cookies) for m in sub_metas]
+        subtitles = [sub for sub in fetched if sub is not None]
 
         return subtitles, None
-    except requests.RequestException as e:
+    except (requests.RequestException, ValueError) as e:
         return [], {'error': f'Could not fetch subtitles: {e}'}
 
 def get_danmaku(cid):
     """Fetches danmaku for a given cid."""
-    headers = _get_headers()
+    cookies = _get_cookies()
     danmaku_list = []
     try:
         params_danmaku = {'oid': cid}
-        response_danmaku = requests.get(API_GET_DANMAKU, params=params_danmaku, headers=headers)
-        danmaku_content = response_danmaku.content.decode('utf-8', errors='ignore')
-        root = ET.fromstring(danmaku_content)
-        for d in root.findall('d'):
-            danmaku_list.append(d.text)
+        # The slot is held until the streamed body has been parsed
+        with _outbound_slots(), _SESSION.get(API_GET_DANMAKU, params=params_danmaku, cookies=cookies,
+                                             timeout=REQUEST_TIMEOUT, stream=True) as response_danmaku:
+            # Parse incrementally from the socket so neither the full body nor
+            # the full tree is held in memory; urllib3 undoes the deflate encoding
+            response_danmaku.raw.decode_content = True
+            events = ET.iterparse(response_danmaku.raw, events=('start', 'end'))
+            _, root = next(events)
+            for event, elem in events:
+                if event == 'end' and elem.tag == 'd':
+                    danmaku_list.append(elem.text)
+                    # Detach parsed elements from the root so the tree stays small
+                    root.clear()
         return danmaku_list, None
-    except (requests.RequestException, ET.ParseError) as e:
+    except (requests.RequestException, urllib3.exceptions.HTTPError, ET.ParseError) as e:
         return [], {'error': f'Failed to get or parse danmaku: {e}'}
 
 def get_comments(aid):
     """Fetches comments for a given aid."""
-    headers = _get_headers()
+    cookies = _get_cookies()
     comments_list = []
     try:
         params_comments = {'type': 1, 'oid': aid, 'sort': 2}  # sort=2 fetches hot comments
-        response_comments = requests.get(API_GET_COMMENTS, params=params_comments, headers=headers)
+        response_comments = _request('GET', API_GET_COMMENTS, params=params_comments, cookies=cookies)
         response_comments.raise_for_status()
-        comments_data = response_comments.json()
+        comments_data = _json_loads(response_comments.content)
 
         if comments_data.get('code') == 0 and comments_data.get('data', {}).get('replies'):
             for comment in comments_data['data']['replies']:
@@ -364,7 +706,7 @@ def get_comments(aid):
                         'likes': comment.get('like', 0)
                     })
         return comments_list, None
-    except requests.RequestException as e:
+    except (requests.RequestException, ValueError) as e:
         return [], {'error': f'Failed to get comments: {e}'}
 
 
@@ -395,7 +737,7 @@ def search_by_type(keyword: str, search_type: str = 'video', order: str = None,
     if search_type not in SEARCH_TYPES:
         return [], {'error': f'Invalid search_type: {search_type}. Valid types: {list(SEARCH_TYPES.keys())}'}
 
-    headers = _get_headers(with_buvid3=True)
+    cookies = _get_cookies(with_buvid3=True)
     params = {
         'keyword': keyword,
         'search_type': search_type,
@@ -423,9 +765,9 @@ def search_by_type(keyword: str, search_type: str = 'video', order: str = None,
     signed_params = _sign_params_wbi(params)
 
     try:
-        response = requests.get(API_SEARCH_TYPE, params=signed_params, headers=headers)
+        response = _request('GET', API_SEARCH_TYPE, params=signed_params, cookies=cookies)
         response.raise_for_status()
-        data = response.json()
+        data = _json_loads(response.content)
 
         if data.get('code') != 0:
             return [], {'error': f"API error: {data.get('message', 'Unknown error')}", 'code': data.get('code')}
@@ -447,105 +789,12 @@ def search_by_type(keyword: str, search_type: str = 'video', order: str = None,
                 'numPages': result_data.get('numPages', 0)
             }, None
 
-        # Format results based on search type
-        formatted_results = []
-        for item in results:
-            if search_type == 'video':
-                formatted_results.append({
-                    'bvid': item.get('bvid'),
-                    'title': _strip_html_tags(item.get('title', '')),
-                    'author': item.get('author'),
-                    'mid': item.get('mid'),
-                    'play': item.get('play'),
-                    'danmaku': item.get('video_review'),
-                    'favorites': item.get('favorites'),
-                    'duration': item.get('duration'),
-                    'pubdate': _format_timestamp(item.get('pubdate')),
-                    'description': item.get('description'),
-                    'pic': item.get('pic'),
-                    'tag': item.get('tag')
-                })
-            elif search_type in ['media_bangumi', 'media_ft']:
-                formatted_results.append({
-                    'media_id': item.get('media_id'),
-                    'season_id': item.get('season_id'),
-                    'title': _strip_html_tags(item.get('title', '')),
-                    'org_title': item.get('org_title'),
-                    'cover': item.get('cover'),
-                    'media_type': item.get('media_type'),
-                    'areas': item.get('areas'),
-                    'styles': item.get('styles'),
-                    'cv': item.get('cv'),
-                    'staff': item.get('staff'),
-                    'pubtime': _format_timestamp(item.get('pubtime')),
-                    'media_score': item.get('media_score')
-                })
-            elif search_type in ['live_room']:
-                formatted_results.append({
-                    'roomid': item.get('roomid'),
-                    'title': _strip_html_tags(item.get('title', '')),
-                    'uname': item.get('uname'),
-                    'uid': item.get('uid'),
-                    'online': item.get('online'),
-                    'cover': item.get('cover'),
-                    'user_cover': item.get('user_cover'),
-                    'area_name': item.get('cate_name'),
-                    'tags': item.get('tags')
-                })
-            elif search_type == 'live_user':
-                formatted_results.append({
-                    'uid': item.get('uid'),
-                    'uname': item.get('uname'),
-                    'uface': item.get('uface'),
-                    'roomid': item.get('roomid'),
-                    'live_status': item.get('live_status'),
-                    'tags': item.get('tags')
-                })
-            elif search_type == 'article':
-                formatted_results.append({
-                    'id': item.get('id'),
-                    'title': _strip_html_tags(item.get('title', '')),
-                    'author': item.get('mid'),
-                    'category_name': item.get('category_name'),
-                    'view': item.get('view'),
-                    'like': item.get('like'),
-                    'reply': item.get('reply'),
-                    'pub_time': _format_timestamp(item.get('pub_time')),
-                    'desc': item.get('desc'),
-                    'image_urls': item.get('image_urls')
-                })
-            elif search_type == 'bili_user':
-                formatted_results.append({
-                    'mid': item.get('mid'),
-                    'uname': item.get('uname'),
-                    'usign': item.get('usign'),
-                    'fans': item.get('fans'),
-                    'videos': item.get('videos'),
-                    'level': item.get('level'),
-                    'upic': item.get('upic'),
-                    'official_verify': item.get('official_verify')
-                })
-            elif search_type == 'photo':
-                formatted_results.append({
-                    'id': item.get('id'),
-                    'title': _strip_html_tags(item.get('title', '')),
-                    'mid': item.get('mid'),
-                    'uname': item.get('uname'),
-                    'count': item.get('count'),
-                    'like': item.get('like'),
-                    'view': item.get('view')
-                })
-            elif search_type == 'topic':
-                formatted_results.append({
-                    'topic_id': item.get('topic_id'),
-                    'topic_name': _strip_html_tags(item.get('topic_name', '')),
-                    'update_count': item.get('update_count'),
-                    'view_count': item.get('view_count'),
-                    'discuss_count': item.get('discuss_count'),
-                    'description': item.get('description')
-                })
-            else:
-                formatted_results.append(item)
+        # Format results based on search type; types without a field table pass through
+        projection = _SEARCH_PROJECTIONS.get(search_type)
+        if projection is None:
+            formatted_results = list(results)
+        else:
+            formatted_results = [_project_search_item(item, projection) for item in results]
 
         return {
             'results': formatted_results,
@@ -555,13 +804,29 @@ def search_by_type(keyword: str, search_type: str = 'video', order: str = None,
             'numPages': result_data.get('numPages', 0)
         }, None
 
-    except requests.RequestException as e:
+    except (requests.RequestException, ValueError) as e:
         return [], {'error': f'Failed to perform search: {e}'}
 
 
+def _project_search_item(item: dict, projection: tuple) -> dict:
+    """Pick and transform the fields listed in SEARCH_RESULT_FIELDS from a raw result."""
+    keys, transformed = projection
+    get = item.get
+    formatted = {dst: get(src) for dst, src in keys}
+    # Overwriting existing keys keeps the field order of the table
+    for dst, src, transform in transformed:
+        if transform == 'html':
+            formatted[dst] = _strip_html_tags(get(src, ''))
+        else:
+            formatted[dst] = _format_timestamp(get(src))
+    return formatted
+
+
 def _strip_html_tags(text: str) -> str:
     """Remove HTML tags from text (used for highlighted search results)."""
-    return re.sub(r'<[^>]+>', '', text)
+    if '<' not in text:
+        return text
+    return _HTML_TAG_RE.sub('', text)
 
 
 def _format_timestamp(timestamp) -> str:
@@ -2,20 +2,121 @@
 Bilibili视频信息MCP服务器的核心模块
 """
 
-import argparse
+import asyncio
+import functools
+import time
+try:
+    import orjson
+    _json_dumps = lambda obj: orjson.dumps(obj).decode()
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    import json
+    _json_dumps = functools.partial(json.dumps, ensure_ascii=False, separators=(',', ':'))
 from mcp.server.fastmcp import FastMCP
 from . import bilibili_api
 
 # 创建 FastMCP 服务器实例，命名为 BilibiliVideoInfo
 mcp = FastMCP("BilibiliVideoInfo", dependencies=["requests"])
 
-@mcp.tool(
-    annotations={
-        "title": "获取视频字幕",
-        "readOnlyHint": True,
-        "openWorldHint": False
-    }
-)
+# 工具结果缓存: (工具名, 参数) -> (结果, 过期时间)
+_result_cache = {}
+RESULT_CACHE_TTL = 600  # 缓存时间（秒）
+ERROR_CACHE_TTL = 60  # 错误结果的缓存时间（秒）
+SEARCH_CACHE_TTL = 300  # 搜索结果变化较快，缓存时间较短（秒）
+RESULT_CACHE_MAXSIZE = 128
+DANMAKU_PAGE_SIZE = 1000  # 每页返回的弹幕数量
+
+
+def _error(code: str, message: str) -> dict:
+    """Build the error result shared by all tools."""
+    return {"status": "error", "code": code, "message": message}
+
+
+def _is_error_result(result) -> bool:
+    """Whether a tool result, or any part of a get_all_video_info result, is an error."""
+    if not isinstance(result, dict):
+        return False
+    return result.get("status") == "error" or any(
+        isinstance(value, dict) and value.get("status") == "error" for value in result.values()
+    )
+
+
+def _ttl_cached(ttl: int = RESULT_CACHE_TTL):
+    """Cache tool results in-process, keyed by tool name and arguments.
+
+    Successful results are kept for ttl seconds and errors for ERROR_CACHE_TTL, so a burst of
+    calls with the same bad URL or failing video only reaches Bilibili once a minute.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+            cached = _result_cache.get(key)
+            if cached and cached[1] > time.time():
+                return cached[0]
+
+            result = await fn(*args, **kwargs)
+            # Evict the oldest entry once the cache is full
+            if len(_result_cache) >= RESULT_CACHE_MAXSIZE:
+                _result_cache.pop(next(iter(_result_cache)), None)
+            expires = time.time() + (ERROR_CACHE_TTL if _is_error_result(result) else ttl)
+            _result_cache[key] = (result, expires)
+            return result
+        return wrapper
+    return decorator
+
+
+def _tool(title: str, **kwargs):
+    """Register a read-only tool under the given display title."""
+    return mcp.tool(annotations={"title": title, "readOnlyHint": True, "openWorldHint": False}, **kwargs)
+
+
+def _json_text(fn):
+    """Return a tool's result as a single compact JSON text block.
+
+    FastMCP turns every list item into its own content block, pretty-prints dicts and also
+    attaches a structured copy of the whole result; large danmaku/comment payloads are
+    serialized once here instead. Tools using this are registered with structured_output=False.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return _json_dumps(await fn(*args, **kwargs))
+    return wrapper
+
+
+async def _extract_bvid(url: str):
+    """Extract the BV id, only leaving the event loop when a short link has to be resolved."""
+    if 'b23.tv' in url:
+        return await asyncio.to_thread(bilibili_api.extract_bvid, url)
+    if 'BV' not in url:
+        return None
+    return bilibili_api.extract_bvid(url)
+
+
+async def _resolve_video(url: str, prefetch_wbi: bool = False) -> tuple:
+    """Resolve a video URL to (aid, cid, None), or (None, None, error result) on failure.
+
+    With prefetch_wbi the buvid3 cookie and WBI keys, which don't depend on aid/cid, are
+    resolved alongside the video lookup.
+    """
+    bvid = await _extract_bvid(url)
+    if not bvid:
+        return None, None, _error("invalid_url", f"无法从 URL 提取 BV 号: {url}")
+
+    if prefetch_wbi:
+        (aid, cid, error), _ = await asyncio.gather(
+            asyncio.to_thread(bilibili_api.get_video_basic_info, bvid),
+            asyncio.to_thread(bilibili_api.prefetch_wbi_credentials)
+        )
+    else:
+        aid, cid, error = await asyncio.to_thread(bilibili_api.get_video_basic_info, bvid)
+    if error:
+        return None, None, _error("video_info_failed", f"获取视频信息失败: {error['error']}")
+    return aid, cid, None
+
+
+@_tool("获取视频字幕", structured_output=False)
+@_json_text
+@_ttl_cached()
 async def get_subtitles(url: str, lang: str = None, all_languages: bool = False) -> list:
     """Get subtitles from a Bilibili video
 
@@ -26,65 +127,67 @@ async def get_subtitles(url: str, lang: str = None, all_languages: bool = False)
         all_languages: If True, fetch all available subtitle languages. Default is False.
 
     Returns:
-        List of subtitles. Each entry contains 'lan' (language code), 'lan_doc' (language name), and 'content' (list of subtitle lines).
+        List of subtitles, empty if the video has none. Each entry contains 'lan' (language code), 'lan_doc' (language name), and 'content' (list of subtitle lines).
     """
-    bvid = bilibili_api.extract_bvid(url)
-    if not bvid:
-        return [{"error": f"无法从 URL 提取 BV 号: {url}"}]
+    aid, cid, error = await _resolve_video(url, prefetch_wbi=True)
+    if error:
+        return error
 
-    aid, cid, error = bilibili_api.get_video_basic_info(bvid)
+    subtitles, error = await asyncio.to_thread(
+        bilibili_api.get_subtitles, aid, cid, lang=lang, all_languages=all_languages
+    )
     if error:
-        return [{"error": f"获取视频信息失败: {error['error']}"}]
+        return _error("subtitles_failed", f"获取字幕失败: {error['error']}")
 
-    subtitles, error = bilibili_api.get_subtitles(aid, cid, lang=lang, all_languages=all_languages)
+    return subtitles
+
+@_ttl_cached()
+async def _load_danmaku(url: str) -> list:
+    """Fetch the full danmaku list once per URL so paging through it does not refetch."""
+    aid, cid, error = await _resolve_video(url)
     if error:
-        return [{"error": f"获取字幕失败: {error['error']}"}]
+        return error
 
-    if not subtitles:
-        return [{"message": "该视频没有字幕"}]
+    danmaku, error = await asyncio.to_thread(bilibili_api.get_danmaku, cid)
+    if error:
+        return _error("danmaku_failed", f"获取弹幕失败: {error['error']}")
 
-    return subtitles
+    return danmaku
 
-@mcp.tool(
-    annotations={
-        "title": "获取视频弹幕",
-        "readOnlyHint": True,
-        "openWorldHint": False
+def _danmaku_page(danmaku: list, offset: int, limit: int) -> dict:
+    """Slice one page out of the full danmaku list, with paging information."""
+    offset = max(offset, 0)
+    end = offset + limit if limit > 0 else len(danmaku)
+    return {
+        "total": len(danmaku),
+        "offset": offset,
+        "items": danmaku[offset:end],
+        "next_offset": end if end < len(danmaku) else None
     }
-)
-async def get_danmaku(url: str) -> list:
+
+@_tool("获取视频弹幕", structured_output=False)
+@_json_text
+async def get_danmaku(url: str, offset: int = 0, limit: int = DANMAKU_PAGE_SIZE) -> dict:
     """Get danmaku (bullet comments) from a Bilibili video
-    
+
     Args:
         url: Bilibili video URL, e.g., https://www.bilibili.com/video/BV1x341177NN
-        
+        offset: Index of the first danmaku to return, for paging through popular videos. Default is 0.
+        limit: Maximum number of danmaku to return. Default is 1000; 0 returns all remaining.
+
     Returns:
-        List of danmaku (bullet comments) with content, timestamp and user information
+        Dict with 'total' (number of danmaku on the video), 'offset', 'items' (the danmaku lines
+        in this page) and 'next_offset' (offset of the next page, or null when there are no more).
     """
-    bvid = bilibili_api.extract_bvid(url)
-    if not bvid:
-        return [f"错误: 无法从 URL 提取 BV 号: {url}"]
-    
-    aid, cid, error = bilibili_api.get_video_basic_info(bvid)
-    if error:
-        return [f"获取视频信息失败: {error['error']}"]
-    
-    danmaku, error = bilibili_api.get_danmaku(cid)
-    if error:
-        return [f"获取弹幕失败: {error['error']}"]
-    
-    if not danmaku:
-        return ["该视频没有弹幕"]
-    
-    return danmaku
+    danmaku = await _load_danmaku(url)
+    if _is_error_result(danmaku):
+        return danmaku
 
-@mcp.tool(
-    annotations={
-        "title": "获取视频评论",
-        "readOnlyHint": True,
-        "openWorldHint": False
-    }
-)
+    return _danmaku_page(danmaku, offset, limit)
+
+@_tool("获取视频评论", structured_output=False)
+@_json_text
+@_ttl_cached()
 async def get_comments(url: str) -> list:
     """Get popular comments from a Bilibili video
 
@@ -92,33 +195,56 @@ async def get_comments(url: str) -> list:
         url: Bilibili video URL, e.g., https://www.bilibili.com/video/BV1x341177NN
 
     Returns:
-        List of popular comments including comment content, user information, and metadata such as like counts
+        List of popular comments including comment content, user information, and metadata such as like counts; empty if there are none
     """
-    bvid = bilibili_api.extract_bvid(url)
-    if not bvid:
-        return [f"错误: 无法从 URL 提取 BV 号: {url}"]
-
-    aid, cid, error = bilibili_api.get_video_basic_info(bvid)
+    aid, cid, error = await _resolve_video(url)
     if error:
-        return [f"获取视频信息失败: {error['error']}"]
+        return error
 
-    comments, error = bilibili_api.get_comments(aid)
+    comments, error = await asyncio.to_thread(bilibili_api.get_comments, aid)
     if error:
-        return [f"获取评论失败: {error['error']}"]
-
-    if not comments:
-        return ["该视频没有热门评论"]
+        return _error("comments_failed", f"获取评论失败: {error['error']}")
 
     return comments
 
 
-@mcp.tool(
-    annotations={
-        "title": "分类搜索",
-        "readOnlyHint": True,
-        "openWorldHint": False
+@_tool("获取视频字幕、弹幕和评论", structured_output=False)
+@_json_text
+@_ttl_cached()
+async def get_all_video_info(url: str) -> dict:
+    """Get subtitles, danmaku and popular comments from a Bilibili video in one call
+
+    The video is resolved once and the three are fetched in parallel, which is faster than
+    calling get_subtitles, get_danmaku and get_comments one after another.
+
+    Args:
+        url: Bilibili video URL, e.g., https://www.bilibili.com/video/BV1x341177NN
+
+    Returns:
+        Dict with 'subtitles' (default language, same entries as get_subtitles), 'danmaku' (the first
+        page, in the same shape as get_danmaku; fetch further pages with get_danmaku and next_offset)
+        and 'comments'. A part that failed holds an error dict instead; a part with no content is empty.
+    """
+    aid, cid, error = await _resolve_video(url, prefetch_wbi=True)
+    if error:
+        return error
+
+    # Danmaku go through _load_danmaku so the full list is shared with get_danmaku's paging
+    (subtitles, subtitles_error), danmaku, (comments, comments_error) = await asyncio.gather(
+        asyncio.to_thread(bilibili_api.get_subtitles, aid, cid),
+        _load_danmaku(url),
+        asyncio.to_thread(bilibili_api.get_comments, aid)
+    )
+
+    return {
+        "subtitles": _error("subtitles_failed", f"获取字幕失败: {subtitles_error['error']}") if subtitles_error else subtitles,
+        "danmaku": danmaku if _is_error_result(danmaku) else _danmaku_page(danmaku, 0, DANMAKU_PAGE_SIZE),
+        "comments": _error("comments_failed", f"获取评论失败: {comments_error['error']}") if comments_error else comments
     }
-)
+
+
+@_tool("分类搜索")
+@_ttl_cached(SEARCH_CACHE_TTL)
 async def search(
     keyword: str,
     search_type: str = 'video',
@@ -188,39 +314,39 @@ async def search(
         - Search videos from last 3 days sorted by clicks: order="click", recent_days=3
         - Search videos from last month: recent_days=30 or recent_weeks=4
     """
-    import time as time_module
-
     # Calculate pubtime from recent_days/recent_weeks (priority: recent_weeks > recent_days > pubtime_*)
     if recent_weeks > 0:
-        pubtime_end_s = int(time_module.time())
+        pubtime_end_s = int(time.time())
         pubtime_begin_s = pubtime_end_s - recent_weeks * 7 * 24 * 3600
     elif recent_days > 0:
-        pubtime_end_s = int(time_module.time())
+        pubtime_end_s = int(time.time())
         pubtime_begin_s = pubtime_end_s - recent_days * 24 * 3600
 
-    results, error = bilibili_api.search_by_type(
-        keyword=keyword,
-        search_type=search_type,
-        order=order,
-        page=page,
-        duration=duration,
-        tids=tids,
-        user_type=user_type,
-        order_sort=order_sort,
-        category_id=category_id,
+    # Only forward the optional filters that were actually given
+    filters = {
+        'duration': duration,
+        'tids': tids,
+        'user_type': user_type,
+        'order_sort': order_sort,
+        'category_id': category_id
+    }
+    results, error = await asyncio.to_thread(
+        bilibili_api.search_by_type,
+        keyword,
+        search_type,
+        order,
+        page,
         pubtime_begin_s=pubtime_begin_s,
-        pubtime_end_s=pubtime_end_s
+        pubtime_end_s=pubtime_end_s,
+        **{name: value for name, value in filters.items() if value is not None}
     )
 
     if error:
-        return {"error": error['error']}
+        return _error("search_failed", error['error'])
 
     return results
 
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Bilibili Video Info MCP Server")
-    parser.add_argument('transport', nargs='?', default='stdio', choices=['stdio', 'sse', 'streamable-http'],
-                        help='Transport type (stdio, sse, or streamable-http)')
-    args = parser.parse_args()
-    mcp.run(transport=args.transport)
\ No newline at end of file
+    from . import main
+    main()
\ No newline at end of file